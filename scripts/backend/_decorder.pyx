@@ -0,0 +1,208 @@
+# -*- coding:utf-8 -*-
+# cython: language_level=3, boundscheck=False, wraparound=False
+
+###
+#   MIT License
+#
+#   Copyright (c) 2022 Amano laboratory, Keio University & Processor Research Team, RIKEN Center for Computational Science
+#
+#   Permission is hereby granted, free of charge, to any person obtaining a copy of
+#   this software and associated documentation files (the "Software"), to deal in
+#   the Software without restriction, including without limitation the rights to
+#   use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+#   of the Software, and to permit persons to whom the Software is furnished to do
+#   so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in all
+#   copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#   SOFTWARE.
+#
+#   File:          /scripts/backend/_decorder.pyx
+#   Project:       CGRAOmp
+###
+
+# Cython implementation of decorder.TerminalState and decorder.decode
+# Build with scripts/backend/setup.py; decorder.py falls back to the
+# pure-Python FSM when this extension has not been built.
+
+DEF LARGE_NUM = 1000000000
+
+# FSM states as C ints
+DEF NORMAL = 1
+DEF ESC_BEGIN = 2
+DEF CTRL_START = 3
+
+# byte classes (same encoding as decorder.CLASS_TABLE)
+DEF CLS_PRINT = 0
+DEF CLS_CR = 1
+DEF CLS_LF = 2
+DEF CLS_ESC = 3
+DEF CLS_IGNORE = 4
+DEF CLS_DIGIT = 5
+
+cdef unsigned char CLASS_TABLE[256]
+
+def __init_class_table():
+    cdef int c
+    for c in range(256):
+        CLASS_TABLE[c] = CLS_PRINT
+    for c in (0x07, 0x08, 0x09, 0x0B, 0x0C, 0x7F): # BEL, BS, HT, VT, FF, DEL
+        CLASS_TABLE[c] = CLS_IGNORE
+    CLASS_TABLE[0x0D] = CLS_CR
+    CLASS_TABLE[0x0A] = CLS_LF
+    CLASS_TABLE[0x1B] = CLS_ESC
+    for c in range(48, 58):
+        CLASS_TABLE[c] = CLS_DIGIT
+
+__init_class_table()
+
+cdef class TerminalState:
+    """Incrementally decoded virtual terminal contents
+
+    Accelerated counterpart of decorder.TerminalState with the same
+    attributes and behavior; see the pure-Python class for details.
+    """
+
+    cdef public list rows
+    cdef public long long row
+    cdef public long long col
+    cdef public int stat
+    cdef public long long num
+    cdef public object max_rows
+    cdef public object max_cols
+    cdef public long long revision
+    cdef public long long scrolled
+
+    def __init__(self, max_rows = None, max_cols = None):
+        # rows are materialized on first write; see decorder.TerminalState
+        self.rows = []
+        self.row = 0
+        self.col = 0
+        self.stat = NORMAL
+        self.num = 0
+        self.max_rows = max_rows
+        self.max_cols = max_cols
+        self.revision = 0
+        self.scrolled = 0
+
+    def lines(self):
+        """get the current terminal contents as decoded lines"""
+        return [ l.decode() for l in self.rows]
+
+    def feed(self, const unsigned char[::1] data):
+        """decode a new chunk of bytes, updating the terminal state"""
+        cdef Py_ssize_t i, n = data.shape[0]
+        cdef int stat = self.stat
+        cdef long long row = self.row, col = self.col
+        cdef long long num = self.num
+        cdef long long drow, dcol, cut
+        cdef long long max_rows = -1 if self.max_rows is None \
+                                    else self.max_rows
+        cdef long long max_cols = -1 if self.max_cols is None \
+                                    else self.max_cols
+        cdef unsigned char chr, cls
+
+        if n == 0:
+            return
+
+        self.revision += 1
+        terminal = self.rows
+
+        for i in range(n):
+            chr = data[i]
+            cls = CLASS_TABLE[chr]
+            if stat == NORMAL:
+                if cls == CLS_CR:
+                    col = 0
+                elif cls == CLS_LF:
+                    row += 1
+                    col = 0
+                elif cls == CLS_ESC:
+                    stat = ESC_BEGIN
+                elif cls != CLS_IGNORE:
+                    # characters beyond the retained width are dropped
+                    if max_cols < 0 or col < max_cols:
+                        while row >= len(terminal):
+                            terminal.append(bytearray(b"\x00"))
+                        line = terminal[row]
+                        if col >= len(line):
+                            line.extend(bytes(col + 1 - len(line)))
+                        line[col] = chr
+                    col += 1
+            elif stat == ESC_BEGIN:
+                if chr == 0x5B: # [
+                    stat = CTRL_START
+                    num = 0
+                else:
+                    stat = NORMAL
+            elif stat == CTRL_START:
+                drow = 0
+                dcol = 0
+                if cls == CLS_DIGIT:
+                    num = num * 10 + chr - 48
+                elif chr == ord('A'):
+                    # cursor up
+                    drow = -1
+                elif chr == ord('B'):
+                    # cursor down
+                    drow = 1
+                elif chr == ord('C'):
+                    # cursor right
+                    dcol = 1
+                elif chr == ord('D'):
+                    # cursor left
+                    dcol = -1
+                elif chr == ord('E'):
+                    # beginning of next line
+                    drow = 1
+                    dcol = -LARGE_NUM
+                elif chr == ord('F'):
+                    # beginning of prev line
+                    drow = -1
+                    dcol = -LARGE_NUM
+                elif chr == ord('G'):
+                    # change column
+                    col = num
+                elif chr == ord('n') and num == 6:
+                    # request
+                    pass
+                else:
+                    # not supported sequence so discarded
+                    stat = NORMAL
+
+                if drow != 0 or dcol != 0:
+                    if num == 0:
+                        num = 1
+                    row += num * drow
+                    row = max(row, 0)
+                    col += num * dcol
+                    col = max(col, 0)
+                    stat = NORMAL
+
+        # trim rows scrolled out of the retained window
+        if max_rows >= 0 and len(terminal) > max_rows:
+            cut = len(terminal) - max_rows
+            del terminal[:cut]
+            row = max(row - cut, 0)
+            self.scrolled += cut
+
+        # write the cursor and FSM state back for the next chunk
+        self.stat = stat
+        self.row = row
+        self.col = col
+        self.num = num
+
+cpdef list decode(const unsigned char[::1] data):
+    """decord bytes for virtual terminal output"""
+    if data.shape[0] == 0:
+        return []
+    term = TerminalState()
+    term.feed(data)
+    return term.lines()
@@ -49,21 +49,13 @@ except ImportError:
     Status = None
 
 
-from cProfile import run
-from cmath import inf
-from glob import escape
-from time import sleep
-from typing import List, Tuple, Dict, Set
+from time import time, monotonic
+from typing import List
 from datetime import datetime
-import subprocess
+import asyncio
 import os
-import fcntl
-import re
 
-escape_finder = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-cursor_up_finder = re.compile(r'\x1B\[A')
-
-from .decorder import decode
+from .decorder import TerminalState
 
 def backend_wrapper(files, cmd, panel_num, proc_num, nowait, no_rich):
     jobs = []
@@ -79,7 +71,16 @@ def backend_wrapper(files, cmd, panel_num, proc_num, nowait, no_rich):
 class Header:
     """Display header with clock."""
 
+    def __init__(self):
+        self.__last_sec = None
+        self.__panel = None
+
     def __rich__(self) -> Panel:
+        # the clock only ticks once a second, so reuse the last panel
+        # instead of reformatting it at the refresh rate
+        now = int(time())
+        if now == self.__last_sec:
+            return self.__panel
         grid = Table.grid(expand=True)
         grid.add_column(justify="center", ratio=1)
         grid.add_column(justify="right")
@@ -87,14 +88,19 @@ class Header:
             "Backend mapping processes are running...",
             datetime.now().ctime().replace(":", "[blink]:[/]"),
         )
-        return Panel(grid, style="white on blue")
+        self.__last_sec = now
+        self.__panel = Panel(grid, style="white on blue")
+        return self.__panel
 
 class BackendJob():
 
+    # round-robin CPU assignment for launched mapper processes
+    _next_cpu = 0
+
     def __init__(self, dotfile : str, cmd : List[str]):
         self.dotfile = dotfile
-        self.buf = bytes()
-        self.proc : subprocess.Popen = None
+        self.proc : asyncio.subprocess.Process = None
+        self.task : asyncio.Task = None
         self.finished = False
         self.started = False
         if rich_available:
@@ -102,7 +108,12 @@ class BackendJob():
             self.col_size = c.width
             self.row_size = c.height
         else:
-            (self.col_size, self.row_size) = os.get_terminal_size() 
+            (self.col_size, self.row_size) = os.get_terminal_size()
+        # retain a few screens of history; older rows are recycled
+        self.term = TerminalState(max_rows = self.row_size * 4, \
+                                    max_cols = self.col_size * 4)
+        self.__lines_key = None
+        self.__lines_cache = None
         self.returncode = 0
         self.cmd = cmd
 
@@ -118,7 +129,7 @@ class BackendJob():
     def getReturnCode(self) -> int:
         return self.returncode
 
-    def run(self):
+    async def run(self):
         """run command"""
         self.started = True
         env = dict(os.environ)
@@ -126,10 +137,31 @@ class BackendJob():
         env["LINES"] = str(self.row_size - 4)
         env["DOTFILE_NAME"] = self.dotfile
         # launch a process
-        self.proc = subprocess.Popen(self.cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env = env)
-        # making the stdout non-blocking mode
-        flag = fcntl.fcntl(self.proc.stdout.fileno(), fcntl.F_GETFL)
-        fcntl.fcntl(self.proc.stdout.fileno(), fcntl.F_SETFL, flag | os.O_NONBLOCK)
+        self.proc = await asyncio.create_subprocess_exec(*self.cmd, \
+                        stdout=asyncio.subprocess.PIPE, \
+                        stderr=asyncio.subprocess.STDOUT, env = env)
+        self.__set_scheduling(self.proc.pid)
+        # pump its output in the background until EOF
+        self.task = asyncio.ensure_future(self.__pump())
+
+    def __set_scheduling(self, pid : int):
+        """pin the mapper to one CPU and mark it as a batch workload
+
+        Running many mappers at once otherwise causes heavy context
+        switching between cores; both knobs are Linux-only and best-effort.
+        """
+        if hasattr(os, "sched_setaffinity"):
+            cpu = BackendJob._next_cpu % os.cpu_count()
+            BackendJob._next_cpu += 1
+            try:
+                os.sched_setaffinity(pid, {cpu})
+            except OSError:
+                pass
+        if hasattr(os, "sched_setscheduler"):
+            try:
+                os.sched_setscheduler(pid, os.SCHED_BATCH, os.sched_param(0))
+            except (OSError, PermissionError):
+                pass
 
     def is_finished(self) -> bool:
         return self.finished
@@ -140,33 +172,16 @@ class BackendJob():
     def is_running(self) -> bool:
         return self.started and not self.finished
         
-    def update(self):
-        """Update stdout buffer and check the process status"""
-        if self.proc is not None:
-            if not self.proc.poll(): # only when running
-                ret = self.__readAllSoFar()
-                if not ret is None:
-                    if len(ret) > 0:
-                        self.buf += ret
-                    else:
-                        try:
-                            # check if it is finished
-                            (ret_stdout, _) = self.proc.communicate(timeout=0.1)
-                            if ret_stdout is not None:
-                                self.buf += ret_stdout
-                            self.returncode = self.proc.returncode
-                            self.finished = True
-                            self.proc = None
-                        except subprocess.TimeoutExpired:
-                            pass
-            else:
-                # already finished
-                (ret_stdout, _) = self.proc.communicate()
-                if ret_stdout is not None:
-                                self.buf += ret_stdout
-                self.returncode = self.proc.returncode
-                self.proc = None
-                self.finished = True
+    async def __pump(self):
+        """forward subprocess output into the terminal state until EOF"""
+        while True:
+            chunk = await self.proc.stdout.read(1 << 16)
+            if not chunk:
+                break
+            self.term.feed(chunk)
+        self.returncode = await self.proc.wait()
+        self.proc = None
+        self.finished = True
 
     def kill(self):
         if self.proc is not None:
@@ -174,31 +189,35 @@ class BackendJob():
 
     def readlines(self, max_lines : int = None, width : int = None) -> List[str]:
         """read lines from subprocess stdout"""
+        key = (self.term.revision, max_lines, width)
+        if key == self.__lines_key:
+            return self.__lines_cache
+
+        rows = self.term.rows
+        if max_lines is not None:
+            # wrapping never shrinks a row, so the last max_lines rows
+            # are enough to fill the screen
+            rows = rows[-max_lines:]
+
         if width is not None:
             lines = []
-            for l in decode(self.buf):
+            for r in rows:
+                l = r.decode()
                 if len(l) > width:
                     lines.append(l[:width])
                     lines.append(l[width:])
                 else:
                     lines.append(l)
         else:
-            lines = decode(self.buf)
+            lines = [ r.decode() for r in rows]
 
         if max_lines is None:
             max_lines = len(lines)
-    
-        return lines[-max_lines:]
-
-
 
-    def __readAllSoFar(self, rdata=bytes()) -> bytes:
-        """read stdout of the subprocess as much as possible"""
-        try:
-            rdata = self.proc.stdout.read()
-        except IOError as e:
-            pass
-        return rdata
+        lines = lines[-max_lines:]
+        self.__lines_key = key
+        self.__lines_cache = lines
+        return lines
 
 
 class StatusPanel():
@@ -207,6 +226,8 @@ class StatusPanel():
         self.job_num = len(jobs)
         self.spinner = [Status("", spinner="line") for _ in jobs]
         self.count = 0
+        self.__last_sig = None
+        self.__last_panel = None
 
     def __make_table(self):
         grid = Table.grid(expand=True)
@@ -239,7 +260,15 @@ class StatusPanel():
         return grid
 
     def update(self):
-        return Panel(self.__make_table(), title = "Job status", border_style="cyan")
+        # rebuild the grid only when some job changed state; the cached
+        # panel keeps animating since the spinners render lazily
+        sig = tuple((j.is_started(), j.is_finished(), j.getReturnCode()) \
+                        for j in self.jobs)
+        if sig != self.__last_sig:
+            self.__last_sig = sig
+            self.__last_panel = Panel(self.__make_table(), \
+                                title = "Job status", border_style="cyan")
+        return self.__last_panel
 
 class JobScreen:
     def __init__(self, root : Layout, layout : Layout):
@@ -299,28 +328,33 @@ class RichRunner():
         return layout 
         
     def run(self):
+        asyncio.run(self.__run())
+
+    async def __run(self):
         start = 0
         running : List[BackendJob] = []
+        finished_count = 0
+        last_rotate = monotonic()
         with Live(self.layout, refresh_per_second=10, screen=True):
             while True:
                 # job queue control
                 dispatch_count = min(self.num_proc - len(running),  len(self.job_queue))
                 for i in range(dispatch_count):
-                    self.job_queue[i].run()
+                    await self.job_queue[i].run()
                     running.append(self.job_queue[i])
                 self.job_queue = self.job_queue[dispatch_count:]
 
-                # status update
-                for job in running:
-                    job.update()
-
 
                 if self.num_proc > self.screen_num:
                     view_jobs = running[start:start+self.screen_num]
                     if (len(view_jobs) < self.screen_num):
                         view_jobs += running[:start]
-                    if (count % 10) == 0:
+                    # rotate the visible window once per second of wall
+                    # clock, independent of how often the loop ticks
+                    now = monotonic()
+                    if now - last_rotate >= 1.0:
                         start = (start + self.screen_num) % self.num_proc
+                        last_rotate = now
                 else:
                     view_jobs = running
 
@@ -334,13 +368,17 @@ class RichRunner():
 
 
                 self.layout["status"].update(self.status.update())
-                
-                if sum([j.is_finished() for j in self.jobs]) == len(self.jobs):
+
+                # retire jobs that finished since the last frame
+                for job in [j for j in running if j.is_finished()]:
+                    running.remove(job)
+                    finished_count += 1
+
+                if finished_count == len(self.jobs):
                     break
 
-                running = [job for job in running if job.is_running()]
-                
-                sleep(0.1)
+                # let the pump tasks make progress until the next frame
+                await asyncio.sleep(0.1)
 
             if not self.nowait:
                 input()
@@ -353,16 +391,20 @@ class SimpleRunner():
         self.nowait = nowait
 
     def run(self):
+        asyncio.run(self.__run())
+
+    async def __run(self):
         print("Start backend process")
 
         running : List[BackendJob] = []
+        finished_count = 0
         prev_line_count = dict()
 
         while True:
             dispatch_count = min(self.num_proc - len(running),  len(self.job_queue))
             for i in range(dispatch_count):
                 job = self.job_queue[i]
-                job.run()
+                await job.run()
                 running.append(job)
                 prev_line_count[job] = 0
                 print("Job {0} (PID: {1}) started".format(job.jobName(), job.getPID()))
@@ -371,24 +413,28 @@ class SimpleRunner():
 
             # status update
             for job in running:
-                job.update()
                 lines = job.readlines()
-                new_lines = lines[prev_line_count[job]:]
+                # rows scrolled out of the retained window are gone from
+                # lines, so progress is tracked against the total row
+                # count, which keeps growing past max_rows
+                offset = prev_line_count[job] - job.term.scrolled
+                new_lines = lines[max(offset, 0):]
                 if len(new_lines) > 0:
                     msg = "".join(new_lines)
                     print("[Jobs {0}]:\t{1}".format(self.jobs.index(job), msg))
-                    prev_line_count[job] = len(lines)
-                
-            # check finished jobs
-            for job in running:
-                if (job.is_finished()):
-                    print("job {0} finished with exit code {1}".format(\
-                        job.jobName(), job.getReturnCode()))
-            running = [job for job in running if job.is_running()]
-            if sum([j.is_finished() for j in self.jobs]) == len(self.jobs):
+                    prev_line_count[job] = job.term.scrolled + len(lines)
+
+            # retire finished jobs
+            for job in [j for j in running if j.is_finished()]:
+                print("job {0} finished with exit code {1}".format(\
+                    job.jobName(), job.getReturnCode()))
+                running.remove(job)
+                finished_count += 1
+
+            if finished_count == len(self.jobs):
                 break
 
-            sleep(0.1)
+            await asyncio.sleep(0.1)
 
         if not self.nowait:
             input("All jobs finished. Please enter any key")
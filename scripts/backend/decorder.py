@@ -56,96 +56,187 @@ class DecodeStat(IntEnum):
     NORMAL = auto()
     ESC_BEGIN = auto()
     CTRL_START = auto()
-    END = auto()
-
-def set_char(chr : int, buf : List[List[int]], col, row):
-    # print("set ({0}, {1}) {2}".format(col, row, bytes([chr]).decode()))
-    if row >= len(buf):
-        for _ in range(row + 1 - len(buf)):
-            buf.append([NULL])
-    if col >= len(buf[row]):
-        for _ in range(col + 1 - len(buf[row])):
-            buf[row].append(NULL)
-    buf[row][col] = chr
 
-def decode(data : bytes) -> List[str]:
-    """decord bytes for virtual terminal output"""
-    terminal = [[NULL]]
+# byte classification for the decoder FSM
+CLS_PRINT = 0
+CLS_CR = 1
+CLS_LF = 2
+CLS_ESC = 3
+CLS_IGNORE = 4
+CLS_DIGIT = 5
 
-    if (len(data) == 0):
-        return []
+def __make_class_table() -> bytes:
+    table = bytearray(256)
+    for c in SPECIAL_CHARS:
+        table[c] = CLS_IGNORE
+    table[CR] = CLS_CR
+    table[LF] = CLS_LF
+    table[ESC] = CLS_ESC
+    for c in DECIMAL_CHARS:
+        table[c] = CLS_DIGIT
+    return bytes(table)
+
+CLASS_TABLE = __make_class_table()
+
+# free-list of row buffers recycled when off-screen rows are trimmed,
+# to avoid repeated allocation of similarly sized bytearrays
+_ROW_POOL : List[bytearray] = []
+_ROW_POOL_MAX = 256
+
+def acquire_row() -> bytearray:
+    """get a fresh row buffer, reusing a pooled one if available"""
+    if _ROW_POOL:
+        row = _ROW_POOL.pop()
+        row.clear()
+        row.append(NULL)
+        return row
+    return bytearray((NULL,))
+
+def release_row(row : bytearray):
+    """return a row buffer to the pool for later reuse"""
+    if len(_ROW_POOL) < _ROW_POOL_MAX:
+        _ROW_POOL.append(row)
+
+class TerminalState:
+    """Incrementally decoded virtual terminal contents
+
+    Chunks of subprocess output are fed as they arrive, so each UI refresh
+    only pays for the bytes received since the previous call instead of
+    re-scanning the whole history. When max_rows is given, rows scrolled
+    beyond that window are trimmed and their buffers recycled; max_cols
+    likewise bounds each row, so a job writing a long line without any
+    newline (or jumping the cursor far right) cannot grow a row without
+    limit.
+    """
+
+    def __init__(self, max_rows : int = None, max_cols : int = None):
+        # rows are materialized on first write, so a never-fed state
+        # decodes to no lines rather than a single NUL row
+        self.rows : List[bytearray] = []
+        self.row = 0
+        self.col = 0
+        self.stat = DecodeStat.NORMAL
+        self.num = 0
+        self.max_rows = max_rows
+        self.max_cols = max_cols
+        # bumped on every feed so readers can cache formatted output
+        self.revision = 0
+        # rows trimmed so far; scrolled + len(rows) grows monotonically,
+        # letting readers track progress across the trimming
+        self.scrolled = 0
+
+    def lines(self) -> List[str]:
+        """get the current terminal contents as decoded lines"""
+        return [ l.decode() for l in self.rows]
 
-    stat = DecodeStat.NORMAL
-    row, col = 0, 0
-    i = 0
-    num = 0
-    while stat != DecodeStat.END:
-        chr = data[i]
-        if stat == DecodeStat.NORMAL:
-            if chr in SPECIAL_CHARS:
-                if chr == CR:
+    def feed(self, data : bytes):
+        """decode a new chunk of bytes, updating the terminal state"""
+        if (len(data) == 0):
+            return
+
+        self.revision += 1
+        terminal = self.rows
+        max_cols = self.max_cols
+        stat = self.stat
+        row, col = self.row, self.col
+        num = self.num
+        for chr in data:
+            cls = CLASS_TABLE[chr]
+            if stat == DecodeStat.NORMAL:
+                if cls == CLS_CR:
                     col = 0
-                elif chr == LF:
+                elif cls == CLS_LF:
                     row += 1
                     col = 0
-                elif chr == ESC:
+                elif cls == CLS_ESC:
                     stat = DecodeStat.ESC_BEGIN
-            else:
-                set_char(chr, terminal, col, row)
-                col += 1
-        elif stat == DecodeStat.ESC_BEGIN:
-            if chr == SQBRA:
-                stat = DecodeStat.CTRL_START
-                num = 0
-            else:
-                stat = DecodeStat.NORMAL
-        elif stat == DecodeStat.CTRL_START:
-            cursor_dir = (0, 0)
-
-            if chr in DECIMAL_CHARS:
-                num = num * 10 + chr - DECIMAL_CHARS[0]
-            elif chr == ord('A'):
-                # cursor up
-                cursor_dir = (-1, 0)
-            elif chr == ord('B'):
-                # cursor down
-                cursor_dir = (1, 0)
-            elif chr == ord('C'):
-                # cursor rifht
-                cursor_dir = (0, 1)
-            elif chr == ord('D'):
-                # cursor left
-                cursor_dir = (0, -1)
-            elif chr == ord('E'): 
-                # beginning of next line
-                cursor_dir = (1, -LARGE_NUM)
-            elif chr == ord('F'):
-                # beginning of prev line
-                cursor_dir = (-1, -LARGE_NUM)
-            elif chr == ord('G'):
-                # change column
-                col = num
-            elif chr == ord('n') and num == 6:
-                # request
-                pass         
-            else:
-                # not supported sequence so discarded
-                stat = DecodeStat.NORMAL
-            
-            if cursor_dir != (0, 0):
-                if num == 0:
-                    num = 1
-                row += num * cursor_dir[0]
-                row = max(row, 0)
-                col += num * cursor_dir[1]
-                col = max(col, 0)
-                stat = DecodeStat.NORMAL
-
-        i += 1
-        if i == len(data):
-            stat = DecodeStat.END
-
-    return [ bytes(l).decode() for l in terminal]
+                elif cls != CLS_IGNORE:
+                    # characters beyond the retained width are dropped
+                    if max_cols is None or col < max_cols:
+                        # grow the terminal buffer in one shot if needed
+                        if row >= len(terminal):
+                            terminal.extend(acquire_row() \
+                                            for _ in range(row + 1 - len(terminal)))
+                        line = terminal[row]
+                        if col >= len(line):
+                            line.extend(bytes(col + 1 - len(line)))
+                        line[col] = chr
+                    col += 1
+            elif stat == DecodeStat.ESC_BEGIN:
+                if chr == SQBRA:
+                    stat = DecodeStat.CTRL_START
+                    num = 0
+                else:
+                    stat = DecodeStat.NORMAL
+            elif stat == DecodeStat.CTRL_START:
+                cursor_dir = (0, 0)
+
+                if cls == CLS_DIGIT:
+                    num = num * 10 + chr - 48
+                elif chr == ord('A'):
+                    # cursor up
+                    cursor_dir = (-1, 0)
+                elif chr == ord('B'):
+                    # cursor down
+                    cursor_dir = (1, 0)
+                elif chr == ord('C'):
+                    # cursor rifht
+                    cursor_dir = (0, 1)
+                elif chr == ord('D'):
+                    # cursor left
+                    cursor_dir = (0, -1)
+                elif chr == ord('E'):
+                    # beginning of next line
+                    cursor_dir = (1, -LARGE_NUM)
+                elif chr == ord('F'):
+                    # beginning of prev line
+                    cursor_dir = (-1, -LARGE_NUM)
+                elif chr == ord('G'):
+                    # change column
+                    col = num
+                elif chr == ord('n') and num == 6:
+                    # request
+                    pass
+                else:
+                    # not supported sequence so discarded
+                    stat = DecodeStat.NORMAL
+
+                if cursor_dir != (0, 0):
+                    if num == 0:
+                        num = 1
+                    row += num * cursor_dir[0]
+                    row = max(row, 0)
+                    col += num * cursor_dir[1]
+                    col = max(col, 0)
+                    stat = DecodeStat.NORMAL
+
+        # trim rows scrolled out of the retained window
+        if self.max_rows is not None and len(terminal) > self.max_rows:
+            cut = len(terminal) - self.max_rows
+            for l in terminal[:cut]:
+                release_row(l)
+            del terminal[:cut]
+            row = max(row - cut, 0)
+            self.scrolled += cut
+
+        # write the cursor and FSM state back for the next chunk
+        self.stat = stat
+        self.row, self.col = row, col
+        self.num = num
+
+def decode(data : bytes) -> List[str]:
+    """decord bytes for virtual terminal output"""
+    if (len(data) == 0):
+        return []
+    term = TerminalState()
+    term.feed(data)
+    return term.lines()
+
+try:
+    # use the Cython implementation if the extension has been built
+    from ._decorder import decode, TerminalState
+except ImportError:
+    pass
 
 if __name__ == "__main__":
     with open("/home/members/tkojima/CGRAOmp_build/dump", "rb") as f:
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+###
+#   MIT License
+#
+#   Copyright (c) 2022 Amano laboratory, Keio University & Processor Research Team, RIKEN Center for Computational Science
+#
+#   Permission is hereby granted, free of charge, to any person obtaining a copy of
+#   this software and associated documentation files (the "Software"), to deal in
+#   the Software without restriction, including without limitation the rights to
+#   use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+#   of the Software, and to permit persons to whom the Software is furnished to do
+#   so, subject to the following conditions:
+#
+#   The above copyright notice and this permission notice shall be included in all
+#   copies or substantial portions of the Software.
+#
+#   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#   IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#   FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#   AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#   LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#   OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#   SOFTWARE.
+#
+#   File:          /scripts/cc_config/Cache.py
+#   Project:       CGRAOmp
+###
+
+# Content-addressed cache for pure opt stages of the driver.
+# A stage is keyed by its input IR bytes, its flag list (file paths are
+# excluded, so temporary file names do not defeat the cache), and the
+# identity of the tool binary, so a toolchain upgrade invalidates all
+# entries produced by the old one. On a hit the cached artifact is
+# copied to the requested output and the stage is skipped entirely.
+# Only applicable to stages without side effects besides the output file.
+
+import hashlib
+import os
+import shutil
+from pathlib import Path
+
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", \
+                str(Path.home()) + "/.cache")) / "cgraomp"
+
+# toggled by the driver's --no-cache option
+enabled = True
+
+def disable():
+    """turn off both lookup and store"""
+    global enabled
+    enabled = False
+
+# fingerprints of tool binaries, resolved once per driver run
+__tool_ids = {}
+
+def __tool_id(tool):
+    """identify a tool by its resolved path, mtime, and size"""
+    try:
+        return __tool_ids[tool]
+    except KeyError:
+        pass
+    path = shutil.which(tool) or tool
+    try:
+        st = os.stat(path)
+        ident = "{0}:{1}:{2}".format(path, st.st_mtime_ns, \
+                                        st.st_size).encode()
+    except OSError:
+        # unknown tool state; never reuse such an entry
+        ident = os.urandom(16)
+    __tool_ids[tool] = ident
+    return ident
+
+def make_key(infile, flags, tool):
+    """hash the stage input contents, its flags, and the tool identity
+
+    Returns None when the cache is disabled (no point reading the whole
+    input) or when the input cannot be read; the stage then runs
+    normally and the tool itself reports any real error.
+    """
+    if not enabled:
+        return None
+    h = hashlib.blake2b(digest_size = 16)
+    try:
+        with open(infile, "rb") as f:
+            h.update(f.read())
+    except OSError:
+        return None
+    h.update(repr(tuple(flags)).encode())
+    h.update(__tool_id(tool))
+    return h.hexdigest()
+
+def fetch(key, outfile):
+    """copy the cached artifact to outfile if present"""
+    if not enabled or key is None:
+        return False
+    entry = CACHE_DIR / key
+    try:
+        shutil.copyfile(entry, outfile)
+    except OSError:
+        return False
+    return True
+
+def store(key, outfile):
+    """save a stage output; failures only lose the cache entry"""
+    if not enabled or key is None:
+        return
+    try:
+        CACHE_DIR.mkdir(parents = True, exist_ok = True)
+        tmp = CACHE_DIR / "{0}.{1}".format(key, os.getpid())
+        shutil.copyfile(outfile, tmp)
+        os.replace(tmp, CACHE_DIR / key)
+    except OSError:
+        pass
@@ -31,6 +31,8 @@
 #   Last Modified: 07-07-2022 22:32:56
 ###
 
+import sys
+
 TARGET_FMT = "{target}-unknown-linux-gnu"
 OMP_TARGET_FMT = "openmp-{target}"
 RED_STR = "\x1b[31m{0}\x1b[39m"
@@ -38,10 +40,48 @@ MAGENTA_STR = "\x1b[35m{0}\x1b[39m"
 GREEN_STR = "\x1b[32m{0}\x1b[39m"
 BOLD_STR = "\x1b[1m{0}\x1b[0m"
 
-WARNING_STR = MAGENTA_STR.format(BOLD_STR.format("Warning"))
-ERROR_STR = RED_STR.format(BOLD_STR.format("Error"))
+# f-string helpers; cheaper than str.format on the *_STR templates
+def red(s):
+    return f"\x1b[31m{s}\x1b[39m"
+
+def magenta(s):
+    return f"\x1b[35m{s}\x1b[39m"
+
+def green(s):
+    return f"\x1b[32m{s}\x1b[39m"
+
+def bold(s):
+    return f"\x1b[1m{s}\x1b[0m"
+
+WARNING_STR = magenta(bold("Warning"))
+ERROR_STR = red(bold("Error"))
 
-OPT_FLAGS = {"-O0", "-O1", "-O2", "-O3", "-Os", "-Oz"}
+OPT_FLAGS = frozenset(("-O0", "-O1", "-O2", "-O3", "-Os", "-Oz"))
+
+# analyses that may be dropped when requested twice in a row; they are
+# regenerated lazily by the pass manager, so repeating them only costs
+# argv parsing and option dispatch in opt
+__IDEMPOTENT_ANALYSES = frozenset(("-tti", "-tbaa", "-basic-aa", "-aa", \
+        "-lazy-branch-prob", "-lazy-block-freq", "-opt-remark-emitter", \
+        "-scalar-evolution", "-loops", "-domtree", "-postdomtree"))
+
+def __collapse_flags(flags):
+    # normalize a pipeline by removing consecutive duplicates of
+    # idempotent analyses (the stock lists are already minimal, but
+    # edited pipelines get cleaned up for free)
+    collapsed = []
+    prev = None
+    for f in flags:
+        if f == prev and f in __IDEMPOTENT_ANALYSES:
+            continue
+        collapsed.append(f)
+        prev = f
+    return collapsed
+
+def __intern_flags(flags):
+    # many pass flags repeat dozens of times; interning makes every
+    # occurrence share a single str object and freezing signals const-ness
+    return tuple(sys.intern(f) for f in __collapse_flags(flags))
 
 # pipeline settings for O2 in clang
 CLANG_O2_FLAGS = []
@@ -50,11 +90,14 @@ CLANG_O2_FLAGS.append(["-tti", "-tbaa", "-scoped-noalias-aa", "-assumption-cache
 # 2nd stage
 CLANG_O2_FLAGS.append(["-targetlibinfo", "-tti", "-tbaa", "-scoped-noalias-aa", "-assumption-cache-tracker", "-profile-summary-info", "-annotation2metadata", "-forceattrs", "-inferattrs", "-ipsccp", "-called-value-propagation", "-globalopt", "-domtree", "-mem2reg", "-deadargelim", "-domtree", "-basic-aa", "-aa", "-loops", "-lazy-branch-prob", "-lazy-block-freq", "-opt-remark-emitter", "-instcombine", "-simplifycfg", "-basiccg", "-globals-aa", "-prune-eh", "-inline", "-openmpopt", "-function-attrs", "-domtree", "-sroa", "-basic-aa", "-aa", "-memoryssa", "-early-cse-memssa", "-speculative-execution", "-aa", "-lazy-value-info", "-jump-threading", "-correlated-propagation", "-simplifycfg", "-domtree", "-basic-aa", "-aa", "-loops", "-lazy-branch-prob", "-lazy-block-freq", "-opt-remark-emitter", "-instcombine", "-libcalls-shrinkwrap", "-loops", "-postdomtree", "-branch-prob", "-block-freq", "-lazy-branch-prob", "-lazy-block-freq", "-opt-remark-emitter", "-pgo-memop-opt", "-basic-aa", "-aa", "-loops", "-lazy-branch-prob", "-lazy-block-freq", "-opt-remark-emitter", "-tailcallelim", "-simplifycfg", "-reassociate", "-domtree", "-loops", "-loop-simplify", "-lcssa-verification", "-lcssa", "-basic-aa", "-aa", "-scalar-evolution", "-loop-rotate", "-memoryssa", "-lazy-branch-prob", "-lazy-block-freq", "-licm", "-loop-unswitch", "-simplifycfg", "-domtree", "-basic-aa", "-aa", "-loops", "-lazy-branch-prob", "-lazy-block-freq", "-opt-remark-emitter", "-instcombine", "-loop-simplify", "-lcssa-verification", "-lcssa", "-scalar-evolution", "-loop-idiom", "-indvars", "-loop-deletion", "-loop-unroll", "-sroa", "-aa", "-mldst-motion", "-phi-values", "-aa", "-memdep", "-lazy-branch-prob", "-lazy-block-freq", "-opt-remark-emitter", "-gvn", "-phi-values", "-basic-aa", "-aa", "-memdep", "-memcpyopt", "-sccp", "-demanded-bits", "-bdce", "-aa", "-lazy-branch-prob", "-lazy-block-freq", "-opt-remark-emitter", "-instcombine", "-lazy-value-info", "-jump-threading", "-correlated-propagation", "-postdomtree", "-adce", "-basic-aa", "-aa", "-memoryssa", "-dse", "-loops", "-loop-simplify", "-lcssa-verification", "-lcssa", "-aa", "-scalar-evolution", "-lazy-branch-prob", "-lazy-block-freq", "-licm", "-simplifycfg", "-domtree", "-basic-aa", "-aa", "-loops", "-lazy-branch-prob", "-lazy-block-freq", "-opt-remark-emitter", "-instcombine", "-barrier", "-elim-avail-extern", "-basiccg", "-rpo-function-attrs", "-globalopt", "-globaldce", "-basiccg", "-globals-aa", "-domtree", "-float2int", "-lower-constant-intrinsics", "-domtree", "-loops", "-loop-simplify", "-lcssa-verification", "-lcssa", "-basic-aa", "-aa", "-scalar-evolution", "-loop-rotate", "-loop-accesses", "-lazy-branch-prob", "-lazy-block-freq", "-opt-remark-emitter", "-loop-distribute", "-postdomtree", "-branch-prob", "-block-freq", "-scalar-evolution", "-basic-aa", "-aa", "-loop-accesses", "-demanded-bits", "-lazy-branch-prob", "-lazy-block-freq", "-opt-remark-emitter", "-inject-tli-mappings", "-loop-vectorize", "-loop-simplify", "-scalar-evolution", "-aa", "-loop-accesses", "-lazy-branch-prob", "-lazy-block-freq", "-loop-load-elim", "-basic-aa", "-aa", "-lazy-branch-prob", "-lazy-block-freq", "-opt-remark-emitter", "-instcombine", "-simplifycfg", "-domtree", "-loops", "-scalar-evolution", "-basic-aa", "-aa", "-demanded-bits", "-lazy-branch-prob", "-lazy-block-freq", "-opt-remark-emitter", "-inject-tli-mappings", "-slp-vectorizer", "-vector-combine", "-opt-remark-emitter", "-instcombine", "-loop-simplify", "-lcssa-verification", "-lcssa", "-scalar-evolution", "-loop-unroll", "-lazy-branch-prob", "-lazy-block-freq", "-opt-remark-emitter", "-instcombine", "-memoryssa", "-loop-simplify", "-lcssa-verification", "-lcssa", "-scalar-evolution", "-lazy-branch-prob", "-lazy-block-freq", "-licm", "-opt-remark-emitter", "-transform-warning", "-alignment-from-assumptions", "-strip-dead-prototypes", "-globaldce", "-constmerge", "-cg-profile", "-domtree", "-loops", "-postdomtree", "-branch-prob", "-block-freq", "-loop-simplify", "-lcssa-verification", "-lcssa", "-basic-aa", "-aa", "-scalar-evolution", "-block-freq", "-loop-sink", "-lazy-branch-prob", "-lazy-block-freq", "-opt-remark-emitter", "-instsimplify", "-div-rem-pairs", "-simplifycfg", "-annotation-remarks", "-verify"])
 
+CLANG_O2_FLAGS = tuple(__intern_flags(stage) for stage in CLANG_O2_FLAGS)
+
 # default setting for pre optimization when -O0 is specified
 # in this case, only loop canonicalization will be applied
-PRE_OPTS_O0 = [["-polly-canonicalize"]]
+PRE_OPTS_O0 = (__intern_flags(["-polly-canonicalize"]),)
 
 # default setting for pre optimization when -O1 or higher level is specified
 PRE_OPTS = []
-PRE_OPTS.append(["--inferattrs", "--indvars", "--indvars-widen-indvars", "--aa-pipeline=\"basic-aa,scoped-noalias-aa,tbaa,globals-aa,scev-aa\"", "-loop-unroll", "--unroll-allow-partial", "-simplifycfg", "-loop-simplify", "-loop-idiom", "-loop-instsimplify", "-loop-rotate", "-mem2reg", "-instcombine", "-loop-load-elim", "-instsimplify", "--early-cse", "--early-cse-memssa", "-dce",  "--scalar-evolution", "-memoryssa", "-gvn", "-constmerge", "-simplifycfg", "-reassociate", "-instcombine", "-mldst-motion", "-polly-canonicalize"])
+PRE_OPTS.append(["--inferattrs", "--indvars", "--indvars-widen-indvars", "--aa-pipeline=basic-aa,scoped-noalias-aa,tbaa,globals-aa,scev-aa", "-loop-unroll", "--unroll-allow-partial", "-simplifycfg", "-loop-simplify", "-loop-idiom", "-loop-instsimplify", "-loop-rotate", "-mem2reg", "-instcombine", "-loop-load-elim", "-instsimplify", "--early-cse", "--early-cse-memssa", "-dce",  "--scalar-evolution", "-memoryssa", "-gvn", "-constmerge", "-simplifycfg", "-reassociate", "-instcombine", "-mldst-motion", "-polly-canonicalize"])
+PRE_OPTS = tuple(__intern_flags(stage) for stage in PRE_OPTS)
 